@@ -1,22 +1,47 @@
 """
 Board model - collection of tiles, spare pool, mapping and utility functions.
+
+Tile state is kept as one numpy column per metric (structure-of-arrays), indexed
+by the tile's ordinal in ``tile_ids``; ``tiles`` maps ids to Tile views over those rows.
 """
 
 import time
 import json
+import heapq
 import os
 import random
-from typing import Dict, List, Optional
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import codec
+from .tile import Tile, STATUS_NAMES, STATUS_CODES
+
+_ISOLATED = STATUS_CODES["isolated"]
+_SPARE = STATUS_CODES["spare"]
 
-from .tile import Tile
+# Quantized binary snapshot: header, then one fixed-size record per tile.
+# Decode with struct.unpack_from(BINARY_HEADER_FORMAT, ...) and
+# struct.iter_unpack(BINARY_RECORD_FORMAT, records).
+BINARY_HEADER_FORMAT = "<dI"     # timestamp, tile count
+BINARY_RECORD_FORMAT = "<HBbBHI"  # tile number, status code, temp (0.5 C steps from 40 C), load (1/255), error_count, crc
+_BINARY_RECORD = np.dtype([
+    ("tile", "<u2"), ("status", "u1"), ("temp", "i1"), ("load", "u1"), ("error_count", "<u2"), ("crc", "<u4"),
+])  # packed, same layout as BINARY_RECORD_FORMAT
 
 
 class Board:
     def __init__(self, tiles_count: int = 16, spare_count: int = 3, config_path: Optional[str] = None):
         self.tiles: Dict[str, Tile] = {}
         self.spares: List[str] = []
+        # spares that still hold their spare image and are "ok" (dict used as an ordered set)
+        self._ready_spares: Dict[str, None] = {}
         self.config_path = config_path
         self.region_map: Dict = {}
+        # set whenever a metric/status column changes; cleared once serialized
+        self.dirty = True
+        self._snapshot_bytes: Optional[bytes] = None
         self._init_tiles(tiles_count)
         self._init_spares(spare_count)
         if config_path and os.path.exists(config_path):
@@ -27,32 +52,190 @@ class Board:
                 self.region_map = {}
 
     def _init_tiles(self, n: int):
+        # row order == snapshot order; sorted once here (tiles are never added/removed after init)
+        self.tile_ids: List[str] = sorted(f"tile_{i}" for i in range(n))
+        self.temp_c = np.full(n, 40.0)
+        self.voltage_v = np.full(n, 1.0)
+        self.load = np.zeros(n)
+        self.error_count = np.zeros(n)
+        self.status = np.zeros(n, dtype=np.uint8)  # index into STATUS_NAMES
+        self.last_output_crc = np.zeros(n, dtype=np.uint32)
+        # forced-fault bookkeeping used by the vectorized tick
+        self.forced_fault_type = np.zeros(n, dtype=np.uint16)  # 0 = none, see tile.fault_type_id
+        self.fault_until = np.full(n, np.inf)  # time.monotonic() expiry, inf = no expiry
+        # (expiry, row) for every timed fault; entries whose fault was since cleared/replaced are skipped
+        self._fault_expiry_heap: List[Tuple[float, int]] = []
+        # columns are only ever updated in place, so these references stay valid
+        self.metric_columns: Dict[str, np.ndarray] = {
+            "temp_c": self.temp_c,
+            "voltage_v": self.voltage_v,
+            "load": self.load,
+            "error_count": self.error_count,
+        }
+        rows = {tid: i for i, tid in enumerate(self.tile_ids)}
         for i in range(n):
             tid = f"tile_{i}"
-            t = Tile(tile_id=tid)
-            self.tiles[tid] = t
+            self.tiles[tid] = Tile(self, rows[tid], tile_id=tid)
+        self._row_tiles: List[Tile] = [self.tiles[tid] for tid in self.tile_ids]
+        self._tile_numbers = np.array([int(tid.rsplit("_", 1)[1]) for tid in self.tile_ids])
+        # per-row heartbeat dicts, built once and refreshed in place by get_nodes()
+        self._node_snaps: List[Dict] = [
+            {
+                "msg_type": "heartbeat",
+                "node_id": tid,
+                "timestamp": 0.0,
+                "metrics": {"temp_c": 0.0, "voltage_v": 0.0, "load": 0.0, "error_count": 0.0, "last_output_crc": "0x0"},
+                "status": "ok"
+            }
+            for tid in self.tile_ids
+        ]
 
     def _init_spares(self, count: int):
-        all_ids = sorted(self.tiles.keys())
         if count <= 0:
             return
-        spares = all_ids[-count:]
+        spares = self.tile_ids[-count:]
         for s in spares:
             self.spares.append(s)
             self.tiles[s].is_spare = True
             self.tiles[s].pr_loaded = f"spare_{s}"
+            self._refresh_spare(s)
 
     def get_snapshot(self):
-        """Return aggregated snapshot used for heartbeats/status."""
-        return {
-            "msg_type": "status_snapshot",
-            "timestamp": time.time(),
-            "nodes": {tid: self.tiles[tid].snapshot() for tid in sorted(self.tiles.keys())}
-        }
+        """
+        Return aggregated snapshot used for heartbeats/status.
+        The per-tile dicts are reused between calls (see get_nodes): serialize, don't retain.
+        """
+        now = time.time()
+        return {"msg_type": "status_snapshot", "timestamp": now, "nodes": self.get_nodes(now=now)}
+
+    def get_nodes(self, rows: Optional[np.ndarray] = None, now: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        Per-tile heartbeat dicts for the given row indices (all tiles if rows is None).
+        The dicts are preallocated per tile and overwritten on the next call, so callers
+        must serialize them right away and not keep references.
+        """
+        if now is None:
+            now = time.time()
+        if rows is None:
+            row_list = range(len(self.tile_ids))
+            rows = slice(None)
+        else:
+            row_list = rows.tolist()
+        # one C-level conversion per column instead of per-element numpy scalar access
+        temp = self.temp_c[rows].tolist()
+        volt = self.voltage_v[rows].tolist()
+        load = self.load[rows].tolist()
+        errs = self.error_count[rows].tolist()
+        crcs = self.last_output_crc[rows].tolist()
+        status = self.status[rows].tolist()
+        nodes = {}
+        for i, row in enumerate(row_list):
+            snap = self._node_snaps[row]
+            snap["timestamp"] = now
+            metrics = snap["metrics"]
+            metrics["temp_c"] = temp[i]
+            metrics["voltage_v"] = volt[i]
+            metrics["load"] = load[i]
+            metrics["error_count"] = errs[i]
+            metrics["last_output_crc"] = hex(crcs[i])
+            snap["status"] = STATUS_NAMES[status[i]]
+            nodes[snap["node_id"]] = snap
+        return nodes
+
+    def iter_snapshot_chunks(self, tiles_per_chunk: int = 64):
+        """
+        Yield the same newline-terminated status_snapshot frame as get_snapshot_bytes(),
+        in pieces of at most tiles_per_chunk tiles, for streaming large boards.
+        """
+        now = time.time()
+        yield b'{"msg_type":"status_snapshot","timestamp":' + codec.dumps(now) + b',"nodes":{'
+        n = len(self.tile_ids)
+        for start in range(0, n, tiles_per_chunk):
+            rows = np.arange(start, min(start + tiles_per_chunk, n))
+            body = codec.dumps(self.get_nodes(rows, now))[1:-1]  # drop the enclosing {}
+            yield body if start == 0 else b"," + body
+        yield b"}}\n"
+
+    def get_snapshot_binary(self) -> bytes:
+        """Quantized snapshot (see BINARY_HEADER_FORMAT / BINARY_RECORD_FORMAT), 11 bytes per tile."""
+        n = len(self.tile_ids)
+        if n and self._tile_numbers.max() > 0xFFFF:
+            raise ValueError("tile numbers above 65535 do not fit the binary snapshot layout")
+        rec = np.empty(n, dtype=_BINARY_RECORD)
+        rec["tile"] = self._tile_numbers
+        rec["status"] = self.status
+        rec["temp"] = np.clip(np.rint((self.temp_c - 40.0) * 2), -128, 127)
+        rec["load"] = np.clip(np.rint(self.load * 255), 0, 255)
+        rec["error_count"] = np.clip(np.rint(self.error_count), 0, 65535)
+        rec["crc"] = self.last_output_crc
+        return struct.pack(BINARY_HEADER_FORMAT, time.time(), n) + rec.tobytes()
+
+    def quantized_state(self) -> np.ndarray:
+        """
+        Integer fingerprint per tile (one row each) of the fields clients act on,
+        quantized so sub-resolution drift does not count as a change.
+        """
+        return np.column_stack((
+            self.status,
+            self.last_output_crc,
+            np.rint(self.temp_c * 10),       # 0.1 C
+            np.rint(self.voltage_v * 100),   # 10 mV
+            np.rint(self.load * 100),        # 1 %
+            np.rint(self.error_count * 2),   # 0.5 errors
+        )).astype(np.int64)
+
+    def mark_dirty(self):
+        """Force the next get_snapshot_bytes() to re-serialize."""
+        self.dirty = True
+
+    def get_snapshot_bytes(self) -> bytes:
+        """
+        Return the snapshot as newline-terminated JSON bytes, ready to write to a socket.
+        Re-serializes only when tile state changed; otherwise the cached bytes are reused
+        (so the embedded timestamps are those of the last change).
+        """
+        if self._snapshot_bytes is None or self.dirty:
+            self._snapshot_bytes = codec.dumps_line(self.get_snapshot())
+            self.dirty = False
+        return self._snapshot_bytes
 
     def tick_all(self):
-        for t in self.tiles.values():
-            t.tick()
+        """Periodic physical model for all tiles: fault expiry, thermal drift, error decay."""
+        # interval math on the monotonic clock (immune to wall-clock steps), read once per tick
+        now = time.monotonic()
+        self._clear_expired(now)
+
+        # isolated/spare-status tiles with no forced fault are parked: no drift, no decay
+        parked = ((self.status == _ISOLATED) | (self.status == _SPARE)) & (self.forced_fault_type == 0)
+        rows = np.flatnonzero(~parked) if parked.any() else slice(None)
+
+        # thermal model - heat from load, then simple cooling toward base
+        base = 40.0
+        cur = self.temp_c[rows]
+        temp = self.load[rows] * 0.01
+        temp += cur
+        temp += (base - temp) * 0.01
+        np.round(temp, 2, out=temp)
+        if not np.array_equal(temp, cur):
+            self.temp_c[rows] = temp
+            self.dirty = True
+
+        # slowly decay error_count where no fault is forced (and nothing to decay is skipped)
+        decay = (self.forced_fault_type == 0) & (self.error_count > 0) & ~parked
+        if decay.any():
+            self.error_count[decay] = np.maximum(self.error_count[decay] - 0.05, 0.0)
+            self.dirty = True
+
+    def schedule_fault_expiry(self, row: int, until: float):
+        heapq.heappush(self._fault_expiry_heap, (until, row))
+
+    def _clear_expired(self, now: float):
+        # only the entries that are actually due are touched: O(k log n) instead of a scan per tick
+        heap = self._fault_expiry_heap
+        while heap and heap[0][0] < now:
+            until, row = heapq.heappop(heap)
+            if self.fault_until[row] == until:  # still the fault that scheduled this entry
+                self._row_tiles[row].clear_fault()
 
     def inject_fault(self, tile_id: str, fault_type: str, duration_s: Optional[float] = None, params: Optional[dict] = None):
         if tile_id not in self.tiles:
@@ -82,6 +265,7 @@ class Board:
 
         dst.pr_loaded = src.pr_loaded or f"module_{target_tile}"
         dst.status = "ok"
+        self._refresh_spare(spare_tile)
         dst.metrics = dict(src.metrics)  # copy metrics as snapshot (approx)
         # isolate target
         src.status = "isolated"
@@ -89,7 +273,12 @@ class Board:
         return {"status": "swapped", "target": target_tile, "spare": spare_tile}
 
     def find_available_spare(self) -> Optional[str]:
-        for s in self.spares:
-            if self.tiles[s].status == "ok":
-                return s
-        return None
\ No newline at end of file
+        return next(iter(self._ready_spares), None)
+
+    def _refresh_spare(self, tile_id: str):
+        """Keep _ready_spares in sync after a spare's status or loaded image changed."""
+        t = self.tiles[tile_id]
+        if t.status == "ok" and t.pr_loaded == f"spare_{tile_id}":
+            self._ready_spares[tile_id] = None
+        else:
+            self._ready_spares.pop(tile_id, None)
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""
+JSON encoding for the HAL wire protocol.
+Uses orjson (C, bytes in/out) when installed, stdlib json otherwise.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback
+    orjson = None
+
+if orjson is not None:
+    dumps = orjson.dumps
+    loads = orjson.loads
+else:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+    loads = json.loads  # accepts bytes as well as str
+
+
+def dumps_line(obj) -> bytes:
+    """Encode obj as one newline-terminated JSON frame."""
+    return dumps(obj) + b"\n"
+
+
+# "length" framing: 4-byte big-endian payload length, then the payload (no newline)
+FRAMINGS = ("newline", "length")
+# upper bound on an inbound length-prefixed frame (same as the HALAdapter side); anything
+# larger means the peer is not speaking this framing
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+def length_prefix(payload: bytes) -> bytes:
+    return len(payload).to_bytes(4, "big") + payload
+
+
+def to_length_frame(line: bytes) -> bytes:
+    """Re-frame one newline-terminated frame as a length-prefixed one."""
+    return length_prefix(line[:-1] if line.endswith(b"\n") else line)
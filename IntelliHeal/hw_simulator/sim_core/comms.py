@@ -1,28 +1,82 @@
 """
-HAL-like TCP server for the simulator. Communicates newline-delimited JSON.
+HAL-like TCP server for the simulator. Communicates JSON frames, newline-delimited by
+default or, with framing="length", each prefixed by its 4-byte big-endian length.
+
+Heartbeats: a full status_snapshot on connect and every `full_every` ticks (keepalive);
+in between, a "delta" message carrying only the tiles that changed, or nothing at all.
+
+A client may send {"msg_type":"set_format","format":"binary"} to receive full snapshots
+in the quantized binary layout (Board.get_snapshot_binary) instead of JSON: a JSON line
+{"msg_type":"status_snapshot_bin","nbytes":N} followed by N raw bytes (with length framing,
+the raw bytes are a frame of their own). Deltas stay JSON.
 """
 
 import asyncio
-import json
+import socket
 import time
 import traceback
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+import numpy as np
 
+from . import codec
 from .fault_injector import inject_from_message
 
+# fixed parts of the per-command replies; only cmd_id varies
+_ACK_PREFIX = b'{"msg_type":"cmd_ack","cmd_id":'
+_ACK_SUFFIX = b',"status":"accepted"}\n'
+_FAILED_PREFIX = b'{"msg_type":"cmd_result","cmd_id":'
+_FAILED_SUFFIX = b',"status":"failed","duration_ms":0}\n'
+
+
+def build_ack(cmd_id) -> bytes:
+    """Encoded cmd_ack line for cmd_id."""
+    return _ACK_PREFIX + codec.dumps(cmd_id) + _ACK_SUFFIX
+
+
+def build_failed(cmd_id) -> bytes:
+    """Encoded cmd_result line for a command that raised before producing a result."""
+    return _FAILED_PREFIX + codec.dumps(cmd_id) + _FAILED_SUFFIX
+
 class HALServer:
-    def __init__(self, board, pr_controller, host: str = "127.0.0.1", port: int = 9000, hb_interval: float = 0.1):
+    def __init__(self, board, pr_controller, host: str = "127.0.0.1", port: int = 9000, hb_interval: float = 0.1,
+                 full_every: int = 50, send_queue_size: int = 64, stream_chunk_tiles: int = 64,
+                 framing: str = "newline", reuse_port: bool = False):
+        if framing not in codec.FRAMINGS:
+            raise ValueError(f"unknown framing: {framing}")
         self.board = board
         self.pr = pr_controller
         self.host = host
         self.port = port
+        self.framing = framing
+        # opt-in: with SO_REUSEPORT a second simulator binds the same port and the kernel
+        # splits clients between two unrelated boards
+        self.reuse_port = reuse_port
         self.server = None
         self.clients: List = []
+        # per-client bounded heartbeat queues, each emptied by its own writer task
+        self.send_queue_size = send_queue_size
+        self._send_queues: Dict[asyncio.StreamWriter, asyncio.Queue] = {}
+        self._send_tasks: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+        # held while writing a frame, so a streamed snapshot is never interleaved with other frames
+        self._send_locks: Dict[asyncio.StreamWriter, asyncio.Lock] = {}
+        # clients that asked for binary full snapshots
+        self._binary_clients = set()
+        # status_request replies for boards larger than this are streamed in chunks of this many tiles
+        self.stream_chunk_tiles = stream_chunk_tiles
         self.hb_interval = hb_interval
+        self.full_every = full_every
         self._hb_task = None
+        self._last_snapshot_tick = -1
+        # length-framed copy of the board's cached snapshot bytes (and the bytes it was made from)
+        self._snapshot_src: Optional[bytes] = None
+        self._snapshot_framed: Optional[bytes] = None
+        # board.quantized_state() as of the last broadcast, for delta detection
+        self._last_sent_state: Optional[np.ndarray] = None
 
     async def start(self):
-        self.server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.server = await asyncio.start_server(self._handle_client, self.host, self.port,
+                                                 reuse_port=self.reuse_port)
         self._hb_task = asyncio.create_task(self._hb_loop())
         print(f"HALServer listening on {self.host}:{self.port}")
 
@@ -34,7 +88,14 @@ class HALServer:
         if self.server:
             self.server.close()
             await self.server.wait_closed()
-        # close client writers
+        # stop per-client writer tasks, then close client writers
+        for task in list(self._send_tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._send_tasks.values(), return_exceptions=True)
+        self._send_tasks.clear()
+        self._send_queues.clear()
+        self._send_locks.clear()
+        self._binary_clients.clear()
         for reader, writer in list(self.clients):
             try:
                 writer.close()
@@ -44,20 +105,24 @@ class HALServer:
         self.clients.clear()
 
     async def _hb_loop(self):
+        tick = 0
         try:
             while True:
                 # tick physics first
                 self.board.tick_all()
-                snapshot = self.board.get_snapshot()
-                text = json.dumps(snapshot) + "\n"
-                # broadcast
-                for _, writer in list(self.clients):
-                    try:
-                        writer.write(text.encode())
-                        await writer.drain()
-                    except Exception:
-                        # ignore broken client - cleanup on next read
-                        pass
+                state = self.board.quantized_state()
+                if self._last_sent_state is None or tick - self._last_snapshot_tick >= self.full_every:
+                    # periodic full snapshot (board reuses cached bytes if nothing changed)
+                    payload = self._snapshot_frame()
+                    self._last_snapshot_tick = tick
+                    self._last_sent_state = state
+                    binary = self._binary_snapshot() if self._binary_clients else None
+                    self._broadcast(payload, binary)
+                else:
+                    payload = self._delta_payload(state)
+                    if payload is not None:
+                        self._broadcast(self._frame(payload))
+                tick += 1
                 await asyncio.sleep(self.hb_interval)
         except asyncio.CancelledError:
             return
@@ -65,20 +130,139 @@ class HALServer:
             print("HB loop error:", e)
             traceback.print_exc()
 
+    def _broadcast(self, payload: bytes, binary: Optional[bytes] = None):
+        """
+        Hand the same bytes object to every client queue; never waits on a slow client.
+        `binary` (if given) replaces payload for clients that asked for binary snapshots.
+        """
+        for writer, queue in self._send_queues.items():
+            if binary is not None and writer in self._binary_clients:
+                self._enqueue(writer, queue, binary)
+            else:
+                self._enqueue(writer, queue, payload)
+
+    def _frame(self, line: bytes) -> bytes:
+        """Wire form of one newline-terminated frame under this server's framing."""
+        return codec.to_length_frame(line) if self.framing == "length" else line
+
+    def _snapshot_frame(self) -> bytes:
+        payload = self.board.get_snapshot_bytes()
+        if self.framing == "length":
+            # re-frame only when the board re-serialized
+            if payload is not self._snapshot_src:
+                self._snapshot_src = payload
+                self._snapshot_framed = codec.to_length_frame(payload)
+            return self._snapshot_framed
+        return payload
+
+    def _binary_snapshot(self) -> bytes:
+        body = self.board.get_snapshot_binary()
+        header = codec.dumps_line({"msg_type": "status_snapshot_bin", "nbytes": len(body)})
+        if self.framing == "length":
+            return codec.to_length_frame(header) + codec.length_prefix(body)
+        return header + body
+
+    def _enqueue(self, writer: asyncio.StreamWriter, queue: asyncio.Queue, payload: bytes):
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # client is not keeping up. Dropping a delta would leave it with stale tiles, so
+            # replace everything queued with one full snapshot of the current state.
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self._binary_snapshot() if writer in self._binary_clients else self._snapshot_frame())
+
+    async def _client_writer(self, writer: asyncio.StreamWriter, queue: asyncio.Queue):
+        lock = self._send_locks[writer]
+        try:
+            while True:
+                batch = [await queue.get()]
+                # coalesce whatever else is already queued: one writelines + one drain per wake-up
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+                async with lock:
+                    writer.writelines(batch)
+                    await writer.drain()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # broken client - cleanup happens when its reader ends
+            pass
+
+    async def _send(self, writer: asyncio.StreamWriter, data: bytes):
+        """Write one complete frame to a client, serialized with its other writers."""
+        lock = self._send_locks.get(writer)
+        if lock is None:
+            # client already disconnected
+            return
+        async with lock:
+            writer.write(data)
+            await writer.drain()
+
+    async def _stream_snapshot(self, writer: asyncio.StreamWriter):
+        """
+        Write a status_snapshot chunk by chunk, draining after each one, so a large board
+        is never serialized into a single buffer in memory.
+        """
+        lock = self._send_locks.get(writer)
+        if lock is None:
+            return
+        async with lock:
+            for chunk in self.board.iter_snapshot_chunks(self.stream_chunk_tiles):
+                writer.write(chunk)
+                await writer.drain()
+
+    def _delta_payload(self, state: np.ndarray) -> Optional[bytes]:
+        """Encode the tiles whose quantized state changed since the last broadcast (None if none did)."""
+        changed = np.flatnonzero((state != self._last_sent_state).any(axis=1))
+        if changed.size == 0:
+            return None
+        self._last_sent_state[changed] = state[changed]
+        now = time.time()
+        return codec.dumps_line({"msg_type": "delta", "timestamp": now, "nodes": self.board.get_nodes(changed, now)})
+
+    async def _read_frame(self, reader: asyncio.StreamReader) -> bytes:
+        """
+        Next inbound frame (b"" once the peer closed the connection).
+        Raises ValueError for a length prefix over codec.MAX_FRAME_BYTES (protocol error: the
+        client handler then closes the connection).
+        """
+        if self.framing == "newline":
+            return await reader.readline()
+        try:
+            n = int.from_bytes(await reader.readexactly(4), "big")
+            if n > codec.MAX_FRAME_BYTES:
+                raise ValueError(f"frame length {n} exceeds {codec.MAX_FRAME_BYTES}")
+            return await reader.readexactly(n)
+        except asyncio.IncompleteReadError:
+            return b""
+
     async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
         addr = writer.get_extra_info("peername")
         print(f"Client connected: {addr}")
+        # frames are small and latency-sensitive (acks/results): never let Nagle hold them back
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError:
+                pass
         self.clients.append((reader, writer))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.send_queue_size)
+        self._send_queues[writer] = queue
+        self._send_locks[writer] = asyncio.Lock()
+        self._send_tasks[writer] = asyncio.create_task(self._client_writer(writer, queue))
         try:
+            # full state first; the heartbeat loop only sends deltas between keepalives
+            self._enqueue(writer, queue, self._snapshot_frame())
             while True:
-                line = await reader.readline()
+                line = await self._read_frame(reader)
                 if not line:
                     break
                 try:
-                    text = line.decode().strip()
-                    if not text:
+                    if line.isspace():
                         continue
-                    msg = json.loads(text)
+                    msg = codec.loads(line)
                 except Exception:
                     # ignore malformed
                     continue
@@ -89,14 +273,21 @@ class HALServer:
                     inject_from_message(self.board, msg)
                 elif mtype == "status_request":
                     # immediate reply
-                    snapshot = self.board.get_snapshot()
-                    writer.write((json.dumps(snapshot) + "\n").encode())
-                    await writer.drain()
+                    if writer in self._binary_clients:
+                        await self._send(writer, self._binary_snapshot())
+                    elif len(self.board.tile_ids) > self.stream_chunk_tiles and self.framing == "newline":
+                        # (a length prefix needs the full size up front, so no streaming there)
+                        await self._stream_snapshot(writer)
+                    else:
+                        await self._send(writer, self._snapshot_frame())
+                elif mtype == "set_format":
+                    if msg.get("format") == "binary":
+                        self._binary_clients.add(writer)
+                    else:
+                        self._binary_clients.discard(writer)
                 elif mtype == "cmd_reconfigure":
                     # immediate ack
-                    ack = {"msg_type": "cmd_ack", "cmd_id": msg.get("cmd_id"), "status": "accepted"}
-                    writer.write((json.dumps(ack) + "\n").encode())
-                    await writer.drain()
+                    await self._send(writer, self._frame(build_ack(msg.get("cmd_id"))))
                     # schedule PR execution and later send cmd_result
                     asyncio.create_task(self._exec_reconfig(msg, writer))
                 else:
@@ -107,6 +298,13 @@ class HALServer:
         except Exception as e:
             print("client read error", e)
         finally:
+            task = self._send_tasks.pop(writer, None)
+            if task:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+            self._send_queues.pop(writer, None)
+            self._send_locks.pop(writer, None)
+            self._binary_clients.discard(writer)
             try:
                 writer.close()
                 await writer.wait_closed()
@@ -122,11 +320,9 @@ class HALServer:
         try:
             res = await self.pr.handle_reconfigure(msg)
             # send result
-            writer.write((json.dumps(res) + "\n").encode())
-            await writer.drain()
+            await self._send(writer, self._frame(codec.dumps_line(res)))
         except Exception as e:
             try:
-                writer.write((json.dumps({"msg_type": "cmd_result", "cmd_id": msg.get("cmd_id"), "status": "failed", "duration_ms": 0}) + "\n").encode())
-                await writer.drain()
+                await self._send(writer, self._frame(build_failed(msg.get("cmd_id"))))
             except Exception:
                 pass
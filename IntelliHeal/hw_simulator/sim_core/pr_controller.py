@@ -4,9 +4,16 @@ Provides async handle_reconfigure that returns cmd_result dict.
 """
 
 import asyncio
+import heapq
+import math
 import time
 import random
-from typing import Dict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+_FAILURE_BATCH = 64
+WHEEL_TICK_MS = 1  # timer wheel resolution
 
 class PRController:
     def __init__(self, board, warm_swap_ms: float = 5.0, cold_pr_ms_per_kb: float = 2.0, failure_rate: float = 0.02):
@@ -14,6 +21,16 @@ class PRController:
         self.warm_swap_ms = warm_swap_ms
         self.cold_pr_ms_per_kb = cold_pr_ms_per_kb
         self.failure_rate = failure_rate
+        self._rng = random.Random()
+        self._np_rng = np.random.default_rng()
+        # pre-drawn pass/fail outcomes, refilled in batches
+        self._failure_draws: List[bool] = []
+        # timer wheel: deadline slot (loop time, ms) -> commands waiting on it.
+        # One loop timer is armed for the earliest slot and wakes the whole cohort at once.
+        self._wheel: Dict[int, List[asyncio.Future]] = {}
+        self._wheel_slots: List[int] = []  # heap of the keys of _wheel
+        self._wheel_timer: Optional[asyncio.TimerHandle] = None
+        self._wheel_armed_for: Optional[int] = None
 
     async def handle_reconfigure(self, cmd: Dict):
         """
@@ -24,12 +41,12 @@ class PRController:
         action = cmd.get("action")
         target = cmd.get("target_node")
         spare = cmd.get("spare_id")
-        start = time.time()
+        start = time.monotonic()
 
         # Fast swap path
         if action == "fast_swap" and spare:
-            dur = (self.warm_swap_ms / 1000.0) + random.uniform(0.001, 0.01)
-            await asyncio.sleep(dur)
+            dur = (self.warm_swap_ms / 1000.0) + self._rng.uniform(0.001, 0.01)
+            await self._wheel_sleep(dur)
             # perform swap
             res = self.board.perform_fast_swap(target, spare)
         elif action == "partial_reconfig":
@@ -39,8 +56,8 @@ class PRController:
                 kb = max(1, int(binfo.get("bitstream_kb", 50)))
             except Exception:
                 kb = 50
-            dur = (kb * self.cold_pr_ms_per_kb) / 1000.0 + random.uniform(0.01, 0.05)
-            await asyncio.sleep(dur)
+            dur = (kb * self.cold_pr_ms_per_kb) / 1000.0 + self._rng.uniform(0.01, 0.05)
+            await self._wheel_sleep(dur)
             # apply: clear fault as part of PR emulation
             try:
                 self.board.clear_fault(target)
@@ -48,7 +65,7 @@ class PRController:
                 pass
             res = {"status": "reconfigured"}
         elif action == "isolate":
-            await asyncio.sleep(0.01)
+            await self._wheel_sleep(0.01)
             try:
                 self.board.tiles[target].status = "isolated"
             except Exception:
@@ -56,12 +73,55 @@ class PRController:
             res = {"status": "isolated"}
         else:
             # unsupported action - small delay
-            await asyncio.sleep(0.02)
+            await self._wheel_sleep(0.02)
             res = {"status": "noop"}
 
-        failed = random.random() < self.failure_rate
-        duration_ms = int((time.time() - start) * 1000)
+        failed = self._next_failure()
+        duration_ms = int((time.monotonic() - start) * 1000)
         if failed:
             return {"msg_type": "cmd_result", "cmd_id": cmd_id, "status": "failed", "duration_ms": duration_ms, "sandbox_passed": False}
         else:
             return {"msg_type": "cmd_result", "cmd_id": cmd_id, "status": "success", "duration_ms": duration_ms, "sandbox_passed": True}
+
+    def _next_failure(self) -> bool:
+        if not self._failure_draws:
+            self._failure_draws = (self._np_rng.random(_FAILURE_BATCH) < self.failure_rate).tolist()
+        return self._failure_draws.pop()
+
+    async def _wheel_sleep(self, delay_s: float):
+        loop = asyncio.get_running_loop()
+        await self._wheel_wait(math.ceil((loop.time() + delay_s) * 1000 / WHEEL_TICK_MS) * WHEEL_TICK_MS)
+
+    def _wheel_wait(self, deadline_ms: int) -> asyncio.Future:
+        """Future resolved once the loop clock passes deadline_ms; commands sharing a slot wake together."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        slot = self._wheel.get(deadline_ms)
+        if slot is None:
+            slot = self._wheel[deadline_ms] = []
+            heapq.heappush(self._wheel_slots, deadline_ms)
+        slot.append(fut)
+        if self._wheel_armed_for is None or deadline_ms < self._wheel_armed_for:
+            self._arm_wheel(loop)
+        return fut
+
+    def _arm_wheel(self, loop: asyncio.AbstractEventLoop):
+        if self._wheel_timer is not None:
+            self._wheel_timer.cancel()
+        if not self._wheel_slots:
+            self._wheel_timer = None
+            self._wheel_armed_for = None
+            return
+        first = self._wheel_slots[0]
+        self._wheel_armed_for = first
+        self._wheel_timer = loop.call_at(first / 1000.0, self._advance_wheel, loop)
+
+    def _advance_wheel(self, loop: asyncio.AbstractEventLoop):
+        self._wheel_timer = None
+        now_ms = loop.time() * 1000
+        slots = self._wheel_slots
+        while slots and slots[0] <= now_ms:
+            for fut in self._wheel.pop(heapq.heappop(slots)):
+                if not fut.done():  # waiter may have been cancelled
+                    fut.set_result(None)
+        self._arm_wheel(loop)
@@ -3,7 +3,9 @@ Pre-built scenario helpers. Each returns configuration data or applies
 initial faults / loads to the board for demo purposes.
 """
 
-import random
+import numpy as np
+
+_rng = np.random.default_rng()
 
 def light_load_scenario(board):
     # set small loads across tiles
@@ -11,8 +13,11 @@ def light_load_scenario(board):
         t.metrics["load"] = 0.05 if not t.is_spare else 0.0
 
 def stress_scenario(board):
-    for i, t in enumerate(board.tiles.values()):
-        t.metrics["load"] = random.uniform(0.2, 0.9) if not t.is_spare else 0.0
+    # draw every tile's load in one call and write the column directly
+    spare = np.array([board.tiles[tid].is_spare for tid in board.tile_ids])
+    loads = _rng.uniform(0.2, 0.9, size=len(board.tile_ids))
+    board.load[:] = np.where(spare, 0.0, loads)
+    board.mark_dirty()
 
 def one_fault_scenario(board, tile_id="tile_3"):
     board.inject_fault(tile_id, "missing_heartbeat", duration_s=30.0)
@@ -6,6 +6,8 @@ We expose a small function that runs a few checks on a tile and returns pass/fai
 import asyncio
 import random
 
+_rng = random.Random()
+
 async def run_test_vectors_for_tile(tile, timeout_s: float = 0.1):
     """
     Simulate running a few functional checks on the tile.
@@ -13,9 +15,9 @@ async def run_test_vectors_for_tile(tile, timeout_s: float = 0.1):
     """
     start = asyncio.get_event_loop().time()
     # simulate running a few tests
-    await asyncio.sleep(timeout_s * random.uniform(0.5, 1.2))
+    await asyncio.sleep(timeout_s * _rng.uniform(0.5, 1.2))
     # simplistic pass/fail: small chance of failure
-    passed = random.random() > 0.03
+    passed = _rng.random() > 0.03
     duration_ms = int((asyncio.get_event_loop().time() - start) * 1000)
     details = {
         "temp_c": tile.metrics.get("temp_c"),
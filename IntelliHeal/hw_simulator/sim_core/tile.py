@@ -1,108 +1,209 @@
 """
 Tile model - represents a reconfigurable region on the board.
+
+Numeric tile state (metrics + status) lives in the Board's per-metric columns;
+a Tile is a thin view over its row plus the non-numeric bookkeeping
+(forced fault, loaded bitstream, spare flag).
 """
 
+import math
 import time
 import random
-from typing import Dict, Optional
+from collections.abc import MutableMapping
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+STATUS_NAMES = ("ok", "degraded", "failed", "isolated", "spare")
+STATUS_CODES: Dict[str, int] = {name: code for code, name in enumerate(STATUS_NAMES)}
+
+# private generator: avoids contending on the shared module-level random state
+_rng = random.Random()
+
+METRIC_KEYS = ("temp_c", "voltage_v", "load", "error_count", "last_output_crc")
+
+# registered fault_type -> small int code stored in Board.forced_fault_type (0 = no forced fault).
+# Codes are assigned only by register_fault; any other fault_type shares GENERIC_FAULT_ID.
+FAULT_TYPE_IDS: Dict[str, int] = {}
+GENERIC_FAULT_ID = 1
+_MAX_FAULT_TYPE_ID = 0xFFFF  # Board.forced_fault_type is uint16
+
+
+def fault_type_id(fault_type: str) -> int:
+    """Return the integer code for a fault type (GENERIC_FAULT_ID if it is not registered)."""
+    return FAULT_TYPE_IDS.get(fault_type, GENERIC_FAULT_ID)
+
+
+class TileMetrics(MutableMapping):
+    """dict-like view of one tile's metrics, backed by the board columns."""
+
+    __slots__ = ("_board", "_idx")
+
+    def __init__(self, board, index: int):
+        self._board = board
+        self._idx = index
+
+    def __getitem__(self, key: str):
+        if key == "last_output_crc":
+            return hex(int(self._board.last_output_crc[self._idx]))
+        return float(self._board.metric_columns[key][self._idx])
+
+    def __setitem__(self, key: str, value):
+        if key == "last_output_crc":
+            self._board.last_output_crc[self._idx] = int(value, 16) if isinstance(value, str) else int(value)
+        else:
+            self._board.metric_columns[key][self._idx] = value
+        self._board.dirty = True
+
+    def __delitem__(self, key: str):
+        raise TypeError("tile metrics have a fixed set of keys")
+
+    def __iter__(self):
+        return iter(METRIC_KEYS)
+
+    def __len__(self) -> int:
+        return len(METRIC_KEYS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
 
 
 class Tile:
-    def __init__(self, tile_id: str, function: str = "generic", base_temp: float = 40.0):
+    def __init__(self, board, index: int, tile_id: str, function: str = "generic"):
+        self._board = board
+        self._idx = index
         self.tile_id = tile_id
         self.function = function
-        self.status = "ok"  # ok / degraded / failed / isolated / spare
-        self.metrics: Dict[str, float] = {
-            "temp_c": base_temp,
-            "voltage_v": 1.0,
-            "load": 0.0,
-            "error_count": 0.0,
-            "last_output_crc": "0x0"
-        }
+        self._metrics = TileMetrics(board, index)
         self.last_heartbeat = time.time()
         self.heartbeat_period = 0.005  # internal heartbeat (s)
-        self._forced_fault: Optional[Dict] = None
-        self._fault_until: Optional[float] = None
+        self._forced_fault: Optional[Tuple[int, dict]] = None  # (fault_type_id, params)
         self.pr_loaded: Optional[str] = None
         self.is_spare = False
 
+    @property
+    def status(self) -> str:
+        # ok / degraded / failed / isolated / spare
+        return STATUS_NAMES[self._board.status[self._idx]]
+
+    @status.setter
+    def status(self, value: str):
+        code = STATUS_CODES[value]
+        if code != self._board.status[self._idx]:
+            self._board.status[self._idx] = code
+            self._board.dirty = True
+            if self.is_spare:
+                self._board._refresh_spare(self.tile_id)
+
+    @property
+    def _fault_until(self) -> float:
+        # inf when the forced fault (if any) never expires
+        return float(self._board.fault_until[self._idx])
+
+    @property
+    def metrics(self) -> TileMetrics:
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, values: Dict):
+        self._metrics.update(values)
+
     def snapshot(self):
-        """Return serializable heartbeat/status snapshot."""
-        return {
-            "msg_type": "heartbeat",
-            "node_id": self.tile_id,
-            "timestamp": time.time(),
-            "metrics": dict(self.metrics),
-            "status": self.status
-        }
-
-    def apply_fault(self, fault_type: str, duration_s: Optional[float] = None, params: Optional[dict] = None):
-        """Inject (simulate) a fault."""
+        """Return serializable heartbeat/status snapshot (the board's reused dict: serialize, don't retain)."""
+        return self._board.get_nodes(np.array([self._idx]))[self.tile_id]
+
+    def apply_fault(self, fault_type: str, duration_s: Optional[float] = None, params: Optional[dict] = None,
+                    now: Optional[float] = None):
+        """Inject (simulate) a fault. `now` is a time.monotonic() value, read if not given."""
         params = params or {}
-        self._forced_fault = {"fault_type": fault_type, "params": params}
-        self._fault_until = None if duration_s is None else (time.time() + duration_s)
-
-        if fault_type == "missing_heartbeat":
-            # tile will stop heartbeats (status -> failed)
-            self.status = "failed"
-            self.metrics["error_count"] += params.get("increase", 3)
-        elif fault_type == "stuck_output":
-            self.metrics["error_count"] += params.get("increase", 5)
-            self.status = "degraded"
-        elif fault_type == "overheat":
-            self.metrics["temp_c"] = self.metrics.get("temp_c", 40.0) + params.get("delta", 15.0)
-            self.status = "degraded"
-        elif fault_type == "crc_mismatch":
-            self.metrics["last_output_crc"] = hex(random.getrandbits(16))
-            self.metrics["error_count"] += params.get("increase", 1)
-            self.status = "degraded"
-        elif fault_type == "telemetry_noise":
-            self.metrics["temp_c"] += random.uniform(-5.0, 5.0)
-            self.metrics["error_count"] += 0.5
-            self.status = "degraded"
+        code = fault_type_id(fault_type)
+        self._board.dirty = True
+        self._forced_fault = (code, params)
+        self._board.forced_fault_type[self._idx] = code
+        if duration_s is None:
+            self._board.fault_until[self._idx] = math.inf
         else:
-            self.metrics["error_count"] += 1
-            self.status = "degraded"
+            until = (time.monotonic() if now is None else now) + duration_s
+            self._board.fault_until[self._idx] = until
+            self._board.schedule_fault_expiry(self._idx, until)
+        _FAULT_HANDLERS.get(fault_type, _generic_fault)(self, params)
 
     def clear_fault(self):
         """Clear forced fault and allow recovery."""
         self._forced_fault = None
-        self._fault_until = None
+        self._board.forced_fault_type[self._idx] = 0
+        self._board.fault_until[self._idx] = math.inf
+        self._board.dirty = True
         # gentle recovery
         if self.status != "spare":
             self.status = "ok"
         ec = self.metrics.get("error_count", 0.0)
         self.metrics["error_count"] = max(0.0, ec - 1.0)
 
-    def has_heartbeat(self) -> bool:
-        """Return whether tile is currently producing heartbeats."""
+    def has_heartbeat(self, now: Optional[float] = None) -> bool:
+        """Return whether tile is currently producing heartbeats (`now`: time.monotonic() value)."""
         # If missing_heartbeat fault is set, treat as no heartbeat
-        if self._forced_fault and self._forced_fault.get("fault_type") == "missing_heartbeat":
+        if self._forced_fault and self._forced_fault[0] == _MISSING_HEARTBEAT_ID:
             # if fault has expired, clear it
-            if self._fault_until and time.time() > self._fault_until:
+            if (time.monotonic() if now is None else now) > self._fault_until:
                 self.clear_fault()
                 return True
             return False
         return True
 
-    def tick(self):
-        """Periodic physical model: thermal drift, error decay, fault expiry."""
-        # fault expiry
-        if self._fault_until and time.time() > self._fault_until:
-            self.clear_fault()
-
-        # thermal model - small drift based on load
-        base = 40.0
-        load = float(self.metrics.get("load", 0.0))
-        temp = float(self.metrics.get("temp_c", base))
-        # heat from load
-        temp += (load * 0.5) * 0.02
-        # simple cooling toward base
-        temp += (base - temp) * 0.01
-        self.metrics["temp_c"] = round(temp, 2)
-
-        # slowly decay error_count if no forced fault
-        if not self._forced_fault:
-            ec = self.metrics.get("error_count", 0.0)
-            if ec > 0:
-                self.metrics["error_count"] = max(0.0, ec - 0.05)
+
+# --- fault handlers: how each injected fault_type perturbs a tile ---
+
+def _missing_heartbeat(tile: Tile, params: dict):
+    # tile will stop heartbeats (status -> failed)
+    tile.status = "failed"
+    tile.metrics["error_count"] += params.get("increase", 3)
+
+
+def _stuck_output(tile: Tile, params: dict):
+    tile.metrics["error_count"] += params.get("increase", 5)
+    tile.status = "degraded"
+
+
+def _overheat(tile: Tile, params: dict):
+    tile.metrics["temp_c"] = tile.metrics.get("temp_c", 40.0) + params.get("delta", 15.0)
+    tile.status = "degraded"
+
+
+def _crc_mismatch(tile: Tile, params: dict):
+    tile.metrics["last_output_crc"] = hex(_rng.getrandbits(16))
+    tile.metrics["error_count"] += params.get("increase", 1)
+    tile.status = "degraded"
+
+
+def _telemetry_noise(tile: Tile, params: dict):
+    tile.metrics["temp_c"] += _rng.uniform(-5.0, 5.0)
+    tile.metrics["error_count"] += 0.5
+    tile.status = "degraded"
+
+
+def _generic_fault(tile: Tile, params: dict):
+    tile.metrics["error_count"] += 1
+    tile.status = "degraded"
+
+
+_FAULT_HANDLERS: Dict[str, Callable[[Tile, dict], None]] = {}
+
+
+def register_fault(fault_type: str, handler: Callable[[Tile, dict], None]):
+    """Register (or replace) the handler applied when fault_type is injected."""
+    if fault_type not in FAULT_TYPE_IDS:
+        code = len(FAULT_TYPE_IDS) + GENERIC_FAULT_ID + 1
+        if code > _MAX_FAULT_TYPE_ID:
+            raise ValueError("too many registered fault types")
+        FAULT_TYPE_IDS[fault_type] = code
+    _FAULT_HANDLERS[fault_type] = handler
+
+
+register_fault("missing_heartbeat", _missing_heartbeat)
+register_fault("stuck_output", _stuck_output)
+register_fault("overheat", _overheat)
+register_fault("crc_mismatch", _crc_mismatch)
+register_fault("telemetry_noise", _telemetry_noise)
+
+_MISSING_HEARTBEAT_ID = fault_type_id("missing_heartbeat")
@@ -3,6 +3,8 @@ CLI to start the hardware simulator.
 
 Run from project root:
 python -m hw_simulator.tools.simulator_cli --host 127.0.0.1 --port 9000 --tiles 16 --spares 3
+
+--framing (default: $HAL_FRAMING, else "newline") must match the HAL client.
 """
 
 import asyncio
@@ -10,6 +12,11 @@ import argparse
 import os
 import sys
 
+try:
+    import uvloop  # optional: libuv-based event loop, faster socket I/O
+except ImportError:
+    uvloop = None
+
 # absolute imports work because module is run as package
 from sim_core.board import Board
 from sim_core.pr_controller import PRController
@@ -17,11 +24,13 @@ from sim_core.comms import HALServer
 from sim_core.sim_env import SimEnv
 from sim_core import scenarios
 
-async def run_sim(host: str, port: int, tiles: int, spares: int, hb_interval: float, tick_interval: float):
+async def run_sim(host: str, port: int, tiles: int, spares: int, hb_interval: float, tick_interval: float,
+                  framing: str = "newline", reuse_port: bool = False):
     cfg_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "board_map.json")
     board = Board(tiles_count=tiles, spare_count=spares, config_path=cfg_path)
     pr = PRController(board, warm_swap_ms=5.0, cold_pr_ms_per_kb=2.0, failure_rate=0.02)
-    hal = HALServer(board, pr, host=host, port=port, hb_interval=hb_interval)
+    hal = HALServer(board, pr, host=host, port=port, hb_interval=hb_interval, framing=framing,
+                    reuse_port=reuse_port)
     env = SimEnv(board, tick_interval=tick_interval)
 
     await hal.start()
@@ -49,10 +58,15 @@ def main():
     parser.add_argument("--spares", default=3, type=int)
     parser.add_argument("--hb", default=0.1, type=float)
     parser.add_argument("--tick", default=0.05, type=float)
+    parser.add_argument("--framing", default=os.environ.get("HAL_FRAMING", "newline"), choices=("newline", "length"))
+    parser.add_argument("--reuse-port", action="store_true",
+                        help="bind with SO_REUSEPORT so several simulator processes can share the port")
     args = parser.parse_args()
 
+    run = uvloop.run if uvloop is not None else asyncio.run
     try:
-        asyncio.run(run_sim(args.host, args.port, args.tiles, args.spares, args.hb, args.tick))
+        run(run_sim(args.host, args.port, args.tiles, args.spares, args.hb, args.tick, args.framing,
+                    args.reuse_port))
     except KeyboardInterrupt:
         print("Simulator stopped.")
     except Exception as e:
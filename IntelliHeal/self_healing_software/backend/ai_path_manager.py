@@ -7,15 +7,14 @@ AI Path Manager (lightweight)
 
 import os
 import json
-import hashlib
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "ai_model", "model.json")
 
 class AIPathManager:
     def __init__(self):
         # simple in-memory cache: fingerprint -> plan
-        self.cache: Dict[str, Dict[str, Any]] = {}
+        self.cache: Dict[Tuple, Dict[str, Any]] = {}
         # load any prebuilt model if present (lightweight JSON)
         self.model = None
         if os.path.exists(MODEL_PATH):
@@ -29,11 +28,11 @@ class AIPathManager:
         # example spare inventory (in real deployment this maps to actual hardware region ids)
         self.spare_pool = ["spare_1", "spare_2", "spare_3"]
 
-    def _fingerprint(self, ctx: Dict[str, Any]) -> str:
-        # create deterministic short fingerprint for caching (use node, fault_type, coarse load/temp)
-        key = (ctx.get("node_id",""), ctx.get("fault_type",""), str(int(ctx.get("metrics",{}).get("load",0)*10)), str(int(ctx.get("metrics",{}).get("temp_c",0))))
-        h = hashlib.sha1(repr(key).encode()).hexdigest()
-        return h
+    def _fingerprint(self, ctx: Dict[str, Any]) -> Tuple:
+        # deterministic cache key (node, fault_type, coarse load/temp); tuples hash natively,
+        # so no need to digest it for an in-process dict
+        metrics = ctx.get("metrics", {})
+        return (ctx.get("node_id",""), ctx.get("fault_type",""), int(metrics.get("load",0)*10), int(metrics.get("temp_c",0)))
 
     def register_success(self, ctx: Dict[str, Any], plan: Dict[str,Any]):
         """
@@ -42,6 +41,22 @@ class AIPathManager:
         fp = self._fingerprint(ctx)
         self.cache[fp] = plan
 
+    @staticmethod
+    def _model_plan(spare: str) -> Dict[str, Any]:
+        return {"action":"fast_swap","spare_id":spare,"playbook":f"playbook_for_{spare}","confidence":0.85,"source":"model"}
+
+    def fixed_plans(self) -> Dict[str, Dict[str, Any]]:
+        """
+        fault_type -> plan for fault types the loaded model maps unconditionally
+        (their plan does not depend on node or metrics). Empty without a model.
+        """
+        if not self.model:
+            return {}
+        try:
+            return {ft: self._model_plan(spare) for ft, spare in self.model.get("mapping", {}).items() if spare}
+        except Exception:
+            return {}
+
     def recommend(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """
         Return a recommended recovery plan dict:
@@ -62,7 +77,7 @@ class AIPathManager:
                 mapping = self.model.get("mapping", {})
                 spare = mapping.get(fault_type)
                 if spare:
-                    return {"action":"fast_swap","spare_id":spare,"playbook":f"playbook_for_{spare}","confidence":0.85,"source":"model"}
+                    return self._model_plan(spare)
             except Exception:
                 pass
 
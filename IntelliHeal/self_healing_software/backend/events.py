@@ -0,0 +1,49 @@
+"""
+Event types passed between the detector, healing manager and command sender.
+Slotted dataclasses: compact, fast attribute access, and serialized natively by orjson.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+@dataclass(slots=True)
+class FaultEvent:
+    fault_id: str
+    node_id: str
+    fault_type: str
+    severity: str
+    timestamp: float
+    evidence: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_msg(cls, msg: Dict[str, Any]) -> "FaultEvent":
+        """Build from a fault_event message received over HAL (missing fields get defaults)."""
+        node_id = msg.get("node_id") or msg.get("node") or ""
+        return cls(
+            fault_id=msg.get("fault_id") or f"hal_{node_id}",
+            node_id=node_id,
+            fault_type=msg.get("fault_type", "unknown"),
+            severity=msg.get("severity", "major"),
+            timestamp=msg.get("timestamp", 0.0),
+            evidence=msg.get("evidence") or {},
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fault_id": self.fault_id,
+            "node_id": self.node_id,
+            "fault_type": self.fault_type,
+            "severity": self.severity,
+            "timestamp": self.timestamp,
+            "evidence": self.evidence,
+        }
+
+@dataclass(slots=True)
+class CommandMsg:
+    """cmd_reconfigure sent to the HAL; cmd_id is assigned by CommandSender when left as None."""
+    target_node: str
+    action: Optional[str]
+    spare_id: Optional[str] = None
+    delta_state: Any = None
+    cmd_id: Any = None
+    msg_type: str = "cmd_reconfigure"
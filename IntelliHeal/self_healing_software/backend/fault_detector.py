@@ -5,25 +5,47 @@ Emits fault events via a user-registered callback.
 """
 
 import asyncio
+import heapq
 import time
-from typing import Callable, Dict, Any
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.events import FaultEvent
+
+# rebuild the heartbeat heap once superseded entries are both this many and this share of it
+# (same idea as asyncio's _MIN_SCHEDULED_TIMER_HANDLES / _MIN_CANCELLED_TIMER_HANDLES_FRACTION)
+_MIN_STALE_HB_ENTRIES = 100
+_MIN_STALE_HB_FRACTION = 0.5
+
+# loop errors: retry immediately once, then back off exponentially while they keep coming
+_ERROR_BACKOFF_BASE_S = 0.01
+_ERROR_BACKOFF_MAX_S = 1.0
 
 class FaultDetector:
-    def __init__(self, telemetry_queue: asyncio.Queue, on_fault_callback: Callable[[Dict[str,Any]], None],
-                 heartbeat_timeout_ms: int = 50, error_threshold: int = 5):
+    def __init__(self, telemetry_queue: asyncio.Queue, on_fault_callback: Callable[[FaultEvent], None],
+                 heartbeat_timeout_ms: int = 50, error_threshold: int = 5, sweep_interval_ms: Optional[float] = None):
         """
         telemetry_queue: asyncio.Queue where telemetry JSON messages arrive
         on_fault_callback: function to call when a fault is detected (fault_event)
         heartbeat_timeout_ms: missing heartbeat threshold to mark node suspicious
         error_threshold: metric-based threshold to mark node faulty
+        sweep_interval_ms: time between heartbeat-gap sweeps (default: heartbeat_timeout_ms / 4);
+            sweeps also run while no telemetry arrives
         """
         self.telemetry_queue = telemetry_queue
         self.on_fault = on_fault_callback
         self.heartbeat_timeout_ms = heartbeat_timeout_ms
         self.error_threshold = error_threshold
 
-        self.node_last_seen: Dict[str, float] = {}
+        # time.monotonic_ns() when each node was last heard from (immune to wall-clock steps)
+        self.node_last_seen: Dict[str, int] = {}
         self.node_metrics: Dict[str, Dict] = {}
+        # (last_seen, node_id) min-heap; an entry is stale once node_last_seen[node_id] moved on
+        self._hb_heap: List[Tuple[int, str]] = []
+        if sweep_interval_ms is None:
+            sweep_interval_ms = heartbeat_timeout_ms / 4
+        self.sweep_interval_ns = int(sweep_interval_ms * 1_000_000)
+        self._timeout_ns = int(heartbeat_timeout_ms * 1_000_000)
+        self._last_sweep_ns: Optional[int] = None  # time.monotonic_ns() of the last sweep
         self._task = None
         self._running = False
 
@@ -36,75 +58,143 @@ class FaultDetector:
         if self._task:
             await self._task
 
+    async def run(self):
+        """Run the detection loop in the calling task (e.g. under a TaskGroup) until cancelled."""
+        self._running = True
+        await self._run()
+
     async def _run(self):
+        consecutive_errors = 0
         while self._running:
             try:
-                msg = await self.telemetry_queue.get()
-                await self._process_msg(msg)
+                # wait no longer than the next sweep is due, so silent nodes are caught even
+                # when nothing arrives at all
+                if self._last_sweep_ns is None:
+                    wait_ns = self.sweep_interval_ns
+                else:
+                    wait_ns = max(0, self._last_sweep_ns + self.sweep_interval_ns - time.monotonic_ns())
+                try:
+                    batch = [await asyncio.wait_for(self.telemetry_queue.get(), timeout=wait_ns / 1e9)]
+                except asyncio.TimeoutError:
+                    batch = []
+                # drain everything already queued: one wake-up per burst instead of per message
+                while True:
+                    try:
+                        batch.append(self.telemetry_queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                # clocks read once per batch: monotonic for gap math, wall clock for event timestamps
+                now_ns = time.monotonic_ns()
+                wall_now = time.time()
+                faults = []
+                readings = []  # (node_id, ts, error_count, status_code) per heartbeat in the batch
+                for msg in batch:
+                    try:
+                        evt = self._process_msg(msg, readings, now_ns, wall_now)
+                    except (AttributeError, TypeError, ValueError) as e:
+                        # malformed message: skip it, keep the rest of the batch
+                        print("FaultDetector bad message:", e)
+                        continue
+                    if evt is not None:
+                        faults.append(evt)
+                faults.extend(self._threshold_faults(readings))
+                # heartbeat sweep at most once per wake-up, and no more often than sweep_interval_ns
+                if self._last_sweep_ns is None or now_ns - self._last_sweep_ns >= self.sweep_interval_ns:
+                    self._last_sweep_ns = now_ns
+                    faults.extend(self._check_heartbeat_gaps(now_ns, wall_now))
+                for evt in faults:
+                    self._emit_fault(evt)
+                consecutive_errors = 0
             except Exception as e:
                 print("FaultDetector loop error:", e)
-                await asyncio.sleep(0.05)
+                consecutive_errors += 1
+                if consecutive_errors > 1:
+                    await asyncio.sleep(min(_ERROR_BACKOFF_MAX_S, _ERROR_BACKOFF_BASE_S * 2 ** (consecutive_errors - 2)))
 
-    async def _process_msg(self, msg: dict):
+    def _process_msg(self, msg: dict, readings: List[Tuple], now_ns: int, wall_now: float) -> Optional[FaultEvent]:
         """
         Expected telemetry message patterns:
         - heartbeat: {"msg_type":"heartbeat","node_id":"tile_A","timestamp":..., "metrics": {...}}
         - status_snapshot or other messages also accepted.
+        Heartbeat readings are appended to `readings` for the batch-wide threshold check;
+        a passed-through fault event is returned (emission happens after the batch).
+        now_ns / wall_now: the batch's time.monotonic_ns() and time.time().
         """
         mtype = msg.get("msg_type", "").lower()
-        ts = msg.get("timestamp", time.time())
+        ts = msg.get("timestamp", wall_now)
         if mtype == "heartbeat" or "node_id" in msg:
             node_id = msg.get("node_id") or msg.get("node")
             if not node_id:
-                return
-            self.node_last_seen[node_id] = ts
+                return None
+            self._mark_seen(node_id, now_ns)
             metrics = msg.get("metrics", {})
             self.node_metrics[node_id] = metrics
-            # quick checks
             error_count = metrics.get("error_count", 0)
             status_code = msg.get("status_code", 0) or metrics.get("status_code", 0)
-            if error_count >= self.error_threshold or status_code != 0:
-                # emit fault event
-                evt = {
-                    "fault_id": f"fault_{node_id}_{int(ts)}",
-                    "node_id": node_id,
-                    "fault_type": "error_count_exceeded" if error_count >= self.error_threshold else "status_nonzero",
-                    "severity": "major" if error_count >= self.error_threshold else "minor",
-                    "timestamp": ts,
-                    "evidence": {"error_count": error_count, "status_code": status_code}
-                }
-                await self._emit_fault(evt)
+            if not isinstance(error_count, (int, float)) or not isinstance(status_code, (int, float)):
+                raise TypeError(f"non-numeric error_count/status_code from {node_id}")
+            readings.append((node_id, ts, error_count, status_code))
         else:
             # other messages - if they include fault info, pass through
             if mtype == "fault_event":
-                await self._emit_fault(msg)
+                return FaultEvent.from_msg(msg)
+        return None
+
+    def _threshold_faults(self, readings: List[Tuple]) -> List[FaultEvent]:
+        """Fault events for heartbeat readings over error_threshold or with a nonzero status code."""
+        faults = []
+        for node_id, ts, error_count, status_code in readings:
+            over = error_count >= self.error_threshold
+            if not over and status_code == 0:
+                continue
+            faults.append(FaultEvent(
+                fault_id=f"fault_{node_id}_{int(ts)}",
+                node_id=node_id,
+                fault_type="error_count_exceeded" if over else "status_nonzero",
+                severity="major" if over else "minor",
+                timestamp=ts,
+                evidence={"error_count": error_count, "status_code": status_code}
+            ))
+        return faults
 
-        # After processing message, run heartbeat sweep to detect missing nodes (periodic)
-        await self._check_heartbeat_gaps()
+    def _mark_seen(self, node_id: str, seen_ns: int):
+        self.node_last_seen[node_id] = seen_ns
+        heapq.heappush(self._hb_heap, (seen_ns, node_id))
+        stale = len(self._hb_heap) - len(self.node_last_seen)
+        if stale > _MIN_STALE_HB_ENTRIES and stale > _MIN_STALE_HB_FRACTION * len(self._hb_heap):
+            # drop superseded entries in one O(n) pass
+            self._hb_heap = [(last, node) for node, last in self.node_last_seen.items()]
+            heapq.heapify(self._hb_heap)
 
-    async def _check_heartbeat_gaps(self):
-        now = time.time()
+    def _check_heartbeat_gaps(self, now_ns: int, wall_now: float) -> List[FaultEvent]:
+        """
+        Report nodes silent for longer than heartbeat_timeout_ms.
+        Only the overdue end of the heap is visited: O(k log n) for k late nodes.
+        """
         to_report = []
-        for node, last in list(self.node_last_seen.items()):
-            delta_ms = (now - last) * 1000.0
+        heap = self._hb_heap
+        while heap and now_ns - heap[0][0] > self._timeout_ns:
+            last, node = heapq.heappop(heap)
+            if self.node_last_seen.get(node) != last:
+                continue  # stale: node has been seen again since
+            delta_ms = (now_ns - last) / 1_000_000
             if delta_ms > self.heartbeat_timeout_ms:
                 # suspicious / fault
-                evt = {
-                    "fault_id": f"hb_miss_{node}_{int(now)}",
-                    "node_id": node,
-                    "fault_type": "missing_heartbeat",
-                    "severity": "critical" if delta_ms > 5*self.heartbeat_timeout_ms else "major",
-                    "timestamp": now,
-                    "evidence": {"last_seen_ms_ago": delta_ms}
-                }
+                evt = FaultEvent(
+                    fault_id=f"hb_miss_{node}_{int(wall_now)}",
+                    node_id=node,
+                    fault_type="missing_heartbeat",
+                    severity="critical" if delta_ms > 5*self.heartbeat_timeout_ms else "major",
+                    timestamp=wall_now,
+                    evidence={"last_seen_ms_ago": delta_ms}
+                )
                 to_report.append(evt)
                 # delete or keep? keep timestamp but mark we reported once to avoid floods
                 # For simplicity, we will set last_seen to now to avoid duplicate immediate reports.
-                self.node_last_seen[node] = now
-        for evt in to_report:
-            await self._emit_fault(evt)
+                self._mark_seen(node, now_ns)
+        return to_report
 
-    async def _emit_fault(self, fault_event: dict):
+    def _emit_fault(self, fault_event: FaultEvent):
         try:
             self.on_fault(fault_event)
         except Exception as e:
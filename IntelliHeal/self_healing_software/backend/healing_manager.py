@@ -9,7 +9,12 @@ Coordinates steps to heal a detected fault:
 
 import asyncio
 import time
-from typing import Dict, Any, Callable
+from collections import deque
+from typing import Dict, Any, Awaitable, Callable, Optional
+
+from backend.events import CommandMsg, FaultEvent
+
+HISTORY_SIZE = 1024
 
 class HealingManager:
     def __init__(self, ai_manager, cmd_sender, sandbox_timeout=0.2):
@@ -21,38 +26,82 @@ class HealingManager:
         self.ai = ai_manager
         self.cmd = cmd_sender
         self.sandbox_timeout = sandbox_timeout
-        self.history = []  # list of attempts
+        self.history = deque(maxlen=HISTORY_SIZE)  # most recent attempts
         # callback for broadcasting events (UI)
         self.on_event: Callable[[Dict[str,Any]], None] = lambda ev: None
+        # fault_type -> specialized heal coroutine for fault types with a fixed plan
+        # pre-encoded fallback command (see CommandSender.make_template)
+        self._isolate_template = self.cmd.make_template("isolate", None)
+        self._fast_paths: Dict[str, Callable[[FaultEvent], Awaitable[None]]] = {
+            fault_type: self._make_fast_path(plan) for fault_type, plan in self.ai.fixed_plans().items()
+        }
 
-    async def handle_fault(self, fault_event: Dict[str,Any]):
+    async def handle_fault(self, fault_event: FaultEvent):
         """
         End-to-end handling for a single fault event. Non-blocking wrapper.
         """
-        asyncio.create_task(self._run_heal(fault_event))
+        heal = self._fast_paths.get(fault_event.fault_type, self._run_heal)
+        asyncio.create_task(heal(fault_event))
+
+    def _make_fast_path(self, plan: Dict[str, Any]) -> Callable[[FaultEvent], Awaitable[None]]:
+        """
+        Heal coroutine with the plan bound in: no context dict or recommender call, since the
+        model answers the same for every node and metric value of this fault type.
+        The command itself is pre-encoded once. After the first success the bound plan becomes
+        a cache-marked copy, as recommend() returns for a cached plan.
+        """
+        template = self.cmd.make_template(plan.get("action"), plan.get("spare_id"))
+        bound = plan
+
+        def commit(healed: bool):
+            nonlocal bound
+            if healed and bound is plan:
+                bound = {**plan, "confidence": 0.99, "source": "cache"}
 
-    async def _run_heal(self, fault_event: Dict[str,Any]):
-        start_ts = time.time()
-        node = fault_event.get("node_id")
+        async def heal(fault_event: FaultEvent):
+            await self._execute_plan(fault_event, bound, time.monotonic_ns(), commit, template=template)
+        return heal
+
+    async def _run_heal(self, fault_event: FaultEvent):
+        start_ns = time.monotonic_ns()
+        node = fault_event.node_id
         ctx = {
             "node_id": node,
-            "fault_type": fault_event.get("fault_type"),
-            "metrics": fault_event.get("evidence", {})
+            "fault_type": fault_event.fault_type,
+            "metrics": fault_event.evidence
         }
         plan = self.ai.recommend(ctx)
+
+        def commit(healed: bool):
+            if healed:
+                # commit - store in AI cache so future similar faults are resolved instantly
+                self.ai.register_success(ctx, plan)
+
+        await self._execute_plan(fault_event, plan, start_ns, commit)
+
+    async def _execute_plan(self, fault_event: FaultEvent, plan: Dict[str, Any], start_ns: int,
+                            commit: Optional[Callable[[bool], None]] = None, template: Optional[bytes] = None):
+        """
+        Send the plan's command, verify in the sandbox, announce the outcome (falling back to
+        isolation on failure). `commit(healed)` is called as soon as the outcome is known.
+        `template`: the plan's command pre-encoded with CommandSender.make_template, if available.
+        """
+        node = fault_event.node_id
         self._announce({"type":"healing_started","node":node,"plan":plan,"ts":time.time()})
         # fast-path: attempt immediate swap/isolate
-        cmd = {
-            "msg_type":"cmd_reconfigure",
-            "cmd_id": f"cmd_{node}_{int(start_ts*1000)}",
-            "target_node": node,
-            "action": plan.get("action"),
-            "spare_id": plan.get("spare_id"),
-            "delta_state": None  # delta state could be added here
-        }
+        # (no cmd_id: CommandSender assigns the next integer id)
         # send command and wait for result (with timeout)
         try:
-            ack = await self.cmd.send_command(cmd, expect_result=True, timeout=2.0)
+            if template is not None:
+                ack = await self.cmd.send_command_fast(template, node, expect_result=True, timeout=2.0)
+            else:
+                cmd = CommandMsg(
+                    target_node=node,
+                    action=plan.get("action"),
+                    spare_id=plan.get("spare_id"),
+                    delta_state=None  # delta state could be added here
+                )
+                ack = await self.cmd.send_command(cmd, expect_result=True, timeout=2.0)
         except Exception as e:
             ack = {"status":"error","error":str(e)}
         # record attempt
@@ -60,24 +109,17 @@ class HealingManager:
         self.history.append(attempt)
         # Now run sandbox verification in background (non-blocking)
         verified = await self._sandbox_verify(node, plan)
-        if verified and ack.get("status") == "success":
-            # commit - store in AI cache so future similar faults are resolved instantly
-            self.ai.register_success(ctx, plan)
-            self._announce({"type":"healing_success","node":node,"plan":plan,"duration_ms": int((time.time()-start_ts)*1000)})
+        healed = verified and ack.get("status") == "success"
+        if commit is not None:
+            commit(healed)
+        if healed:
+            self._announce({"type":"healing_success","node":node,"plan":plan,"duration_ms": (time.monotonic_ns() - start_ns) // 1_000_000})
         else:
             # try fallback or escalate
             self._announce({"type":"healing_failed","node":node,"plan":plan,"verified":verified,"cmd_result":ack})
-            # naive fallback: try alternative spare if available
-            fallback_plan = {"action":"isolate"}
-            # optionally send fallback
+            # naive fallback: isolate the node
             try:
-                await self.cmd.send_command({
-                    "msg_type":"cmd_reconfigure",
-                    "cmd_id": f"fallback_{node}_{int(time.time()*1000)}",
-                    "target_node": node,
-                    "action": fallback_plan["action"],
-                    "spare_id": None
-                }, expect_result=False, timeout=1.0)
+                await self.cmd.send_command_fast(self._isolate_template, node, expect_result=False, timeout=1.0)
             except Exception:
                 pass
 
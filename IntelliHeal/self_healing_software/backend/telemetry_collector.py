@@ -31,10 +31,8 @@ class TelemetryCollector:
     async def _run(self):
         while self._running:
             try:
+                # blocks on the HAL queue; no polling needed
                 msg = await self.hal.read_json()
-                if msg is None:
-                    await asyncio.sleep(0.01)
-                    continue
                 # Basic validation - we expect dicts with msg_type or telemetry content
                 if isinstance(msg, dict):
                     await self.queue.put(msg)
@@ -4,32 +4,75 @@ Sends high-level reconfiguration commands to hardware via HALAdapter and awaits
 """
 
 import asyncio
-import time
-from typing import Dict, Any
+import itertools
+from typing import Awaitable, Dict, Any, Hashable, Optional, Union
+
+import orjson
+
+from backend.events import CommandMsg
 
 class CommandSender:
     def __init__(self, hal):
         self.hal = hal
-        self._pending = {}  # cmd_id -> Future
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # bound on first send_command
+        # integer cmd_ids: cheap to generate, hash and encode (sent as JSON numbers)
+        self._next_id = itertools.count(1)
+        self._pending: Dict[Hashable, asyncio.Future] = {}  # cmd_id -> Future
 
-    async def send_command(self, cmd: Dict[str,Any], expect_result: bool = True, timeout: float = 2.0) -> Dict[str,Any]:
+    async def send_command(self, cmd: Union[CommandMsg, Dict[str,Any]], expect_result: bool = True,
+                           timeout: float = 2.0) -> Dict[str,Any]:
         """
         Send a command and optionally wait for cmd_result message with matching cmd_id.
         Returns ack/result dict or raises on timeout.
+        A cmd_id already present in cmd is kept; otherwise the next integer id is assigned.
+        """
+        if isinstance(cmd, CommandMsg):
+            if cmd.cmd_id is None:
+                cmd.cmd_id = next(self._next_id)
+            cmd_id = cmd.cmd_id
+        else:
+            cmd_id = cmd.get("cmd_id")
+            if cmd_id is None:
+                cmd_id = cmd["cmd_id"] = next(self._next_id)
+        return await self._send_and_wait(cmd_id, self.hal.send_json(cmd), expect_result, timeout)
+
+    @staticmethod
+    def make_template(action: Optional[str], spare_id: Optional[str]) -> bytes:
+        """
+        Pre-encode a cmd_reconfigure for a fixed action/spare_id; only target_node and cmd_id
+        are filled in per send (see send_command_fast). Same JSON fields as a CommandMsg.
         """
-        cmd_id = cmd.get("cmd_id") or f"cmd_{int(time.time()*1000)}"
-        cmd["cmd_id"] = cmd_id
-        # send
-        ok = await self.hal.send_json(cmd)
-        if not ok:
-            raise RuntimeError("HAL send failed")
-        # if not expecting result, return ack
+        head = (b'{"msg_type":"cmd_reconfigure","action":' + orjson.dumps(action)
+                + b',"spare_id":' + orjson.dumps(spare_id) + b',"delta_state":null,"target_node":')
+        return head.replace(b"%", b"%%") + b'%b,"cmd_id":%d}'
+
+    async def send_command_fast(self, template: bytes, target_node: str, expect_result: bool = True,
+                                timeout: float = 2.0) -> Dict[str,Any]:
+        """
+        send_command for a make_template() command: splices target_node and a fresh integer cmd_id
+        into the pre-encoded bytes instead of building and serializing a command object.
+        """
+        cmd_id = next(self._next_id)
+        payload = template % (orjson.dumps(target_node), cmd_id)
+        return await self._send_and_wait(cmd_id, self.hal.send_raw(payload), expect_result, timeout)
+
+    async def _send_and_wait(self, cmd_id: Hashable, send: Awaitable[bool], expect_result: bool,
+                             timeout: float) -> Dict[str,Any]:
+        """Await `send` (a HAL send coroutine, not yet started) and, if asked, the matching cmd_result."""
         if not expect_result:
+            if not await send:
+                raise RuntimeError("HAL send failed")
+            # not expecting result, return ack
             return {"status":"sent"}
         # wait for result - here we implement a simple pattern: expect hardware to reply with cmd_result
-        fut = asyncio.get_event_loop().create_future()
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        # register before sending so a fast reply cannot arrive ahead of its future
+        fut = self._loop.create_future()
         self._pending[cmd_id] = fut
         try:
+            if not await send:
+                raise RuntimeError("HAL send failed")
             res = await asyncio.wait_for(fut, timeout=timeout)
             return res
         finally:
@@ -38,11 +81,11 @@ class CommandSender:
     def feed_incoming(self, msg: Dict[str,Any]):
         """
         Call this for incoming messages from HALAdapter - it will fulfill pending futures when cmd_result arrives.
+        A cmd_ack only means the HAL accepted the command, so it never resolves a pending future.
         """
         if not isinstance(msg, dict):
             return
-        mtype = msg.get("msg_type","")
-        if mtype in ("cmd_result","cmd_ack"):
+        if msg.get("msg_type") == "cmd_result":
             cid = msg.get("cmd_id")
             fut = self._pending.get(cid)
             if fut and not fut.done():
@@ -1,18 +1,35 @@
 # firmware_interface/hal_adapter.py
 import asyncio
-import json
 import time
-from typing import Optional
+from typing import Callable, Optional
+
+import orjson
+
+# upper bound on a length-prefixed frame; anything larger means the peer is not speaking this framing
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+# log queue overflow once per this many dropped messages
+DROP_LOG_EVERY = 1000
+_COMMAND_REPLY_TYPES = ("cmd_ack", "cmd_result")
 
 class HALAdapter:
     """
     HAL Adapter that exposes async start()/stop(), send_json(), and read_json().
     Internally runs ONE reader coroutine that places parsed JSON messages onto an asyncio.Queue.
     This prevents multiple coroutines from calling StreamReader.readline()/readuntil() concurrently.
+
+    framing: "newline" (newline-delimited JSON, what older peers speak) or "length"
+    (4-byte big-endian payload length + JSON payload); must match the HAL peer.
+
+    on_command_reply: if set, cmd_ack/cmd_result messages are passed to it straight from the
+    reader instead of being queued, so they are never dropped or held up behind telemetry.
     """
 
-    def __init__(self, mode="tcp", tcp_host="127.0.0.1", tcp_port=9000, reconnect_interval=1.0):
+    def __init__(self, mode="tcp", tcp_host="127.0.0.1", tcp_port=9000, reconnect_interval=1.0, framing="newline",
+                 queue_size=4096):
+        if framing not in ("newline", "length"):
+            raise ValueError(f"unknown framing: {framing}")
         self.mode = mode
+        self.framing = framing
         self.tcp_host = tcp_host
         self.tcp_port = tcp_port
         self.reconnect_interval = reconnect_interval
@@ -21,8 +38,10 @@ class HALAdapter:
         self._reader: Optional[asyncio.StreamReader] = None
         self._writer: Optional[asyncio.StreamWriter] = None
 
-        # one queue for incoming parsed json messages
-        self._in_q: asyncio.Queue = asyncio.Queue()
+        # one bounded queue for incoming parsed json messages; oldest dropped on overflow
+        self._in_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.on_command_reply: Optional[Callable[[dict], None]] = None
 
         # background tasks
         self._reader_task: Optional[asyncio.Task] = None
@@ -121,10 +140,24 @@ class HALAdapter:
                 if self._running:
                     await asyncio.sleep(self.reconnect_interval)
 
+    async def _read_frame(self, reader: asyncio.StreamReader) -> bytes:
+        """
+        Read one frame payload. Returns b"" on EOF.
+        """
+        if self.framing == "newline":
+            return await reader.readline()
+        try:
+            n = int.from_bytes(await reader.readexactly(4), "big")
+            if n > MAX_FRAME_BYTES:
+                raise ValueError(f"frame length {n} exceeds {MAX_FRAME_BYTES}")
+            return await reader.readexactly(n)
+        except asyncio.IncompleteReadError:
+            return b""
+
     async def _reader_loop(self):
         """
-        Single reader coroutine that reads lines from the socket and pushes parsed JSON to the queue.
-        This is the only coroutine that performs StreamReader.readline() operations.
+        Single reader coroutine that reads frames from the socket and pushes parsed JSON to the queue.
+        This is the only coroutine that performs StreamReader reads.
         """
         reader = self._reader
         if reader is None:
@@ -132,33 +165,40 @@ class HALAdapter:
 
         try:
             while self._running:
-                # use readline (expects newline-delimited JSON)
                 try:
-                    line = await reader.readline()
+                    frame = await self._read_frame(reader)
                 except asyncio.CancelledError:
                     break
                 except Exception as e:
                     # reading error -> break to cause reconnect
-                    print("HALAdapter read_json error (readline):", e)
+                    print("HALAdapter read_json error (read frame):", e)
                     break
 
-                if not line:
+                if not frame:
                     # EOF or closed connection
                     print("HALAdapter: connection closed by peer (reader returned empty)")
                     break
 
                 try:
-                    text = line.decode().strip()
-                    if not text:
+                    if frame.isspace():
+                        continue
+                    # orjson parses bytes directly (no decode/strip copy)
+                    msg = orjson.loads(frame)
+                    if (self.on_command_reply is not None and isinstance(msg, dict)
+                            and msg.get("msg_type") in _COMMAND_REPLY_TYPES):
+                        # command replies bypass the bounded queue (see on_command_reply)
+                        self.on_command_reply(msg)
                         continue
-                    msg = json.loads(text)
                     # put message into queue without blocking
                     try:
                         self._in_q.put_nowait(msg)
                     except asyncio.QueueFull:
-                        # if full (unlikely), drop oldest then put
-                        _ = await self._in_q.get()
+                        # consumers are not keeping up: drop oldest then put
+                        self._in_q.get_nowait()
                         self._in_q.put_nowait(msg)
+                        self.dropped += 1
+                        if self.dropped % DROP_LOG_EVERY == 1:
+                            print(f"HALAdapter: incoming queue full, {self.dropped} message(s) dropped so far")
                 except Exception as e:
                     # couldn't parse JSON: log and continue
                     print("HALAdapter: parse error for incoming line:", e)
@@ -168,20 +208,34 @@ class HALAdapter:
             # When reader loop exits, ensure reader/writer cleaned up by connect loop
             return
 
-    async def send_json(self, obj: dict):
+    async def send_json(self, obj) -> bool:
+        """
+        Send one JSON frame to the HAL peer (using the adapter's framing).
+        obj: dict or dataclass (e.g. backend.events.CommandMsg; orjson serializes both).
+        Returns True once written, False if there is no connection or the write failed.
+        """
+        return await self.send_raw(orjson.dumps(obj))
+
+    async def send_raw(self, data: bytes) -> bool:
         """
-        Send newline-delimited JSON to the HAL peer.
+        Send one already-encoded JSON payload (no trailing newline), framed per the adapter's framing.
+        Returns True once written, False if there is no connection or the write failed.
         """
         if self._writer is None:
-            raise ConnectionError("HALAdapter: no writer/connection")
-        text = json.dumps(obj) + "\n"
+            print("HALAdapter send error: no writer/connection")
+            return False
+        if self.framing == "length":
+            data = len(data).to_bytes(4, "big") + data
+        else:
+            data += b"\n"
         async with self._writer_lock:
             try:
-                self._writer.write(text.encode())
+                self._writer.write(data)
                 await self._writer.drain()
             except Exception as e:
                 print("HALAdapter send error:", e)
-                raise
+                return False
+        return True
 
     async def read_json(self, timeout: Optional[float] = None):
         """
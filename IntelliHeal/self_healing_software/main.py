@@ -1,7 +1,8 @@
 """
-Main entrypoint: runs FastAPI server, initialises HAL, telemetry collector, detector, AI manager, healing manager.
-This version ensures background tasks are registered and cancelled cleanly on shutdown
-so CTRL+C causes a graceful shutdown.
+Main entrypoint: runs FastAPI server, initialises HAL, detector, AI manager, healing manager.
+hal_incoming_dispatcher is the only HAL reader; it routes each message to the command sender and/or the detector.
+Background loops run under one asyncio.TaskGroup supervisor (Python 3.11+) that restarts them
+if one fails; shutdown (CTRL+C) just cancels the supervisor and every loop is cancelled with it.
 """
 
 import asyncio
@@ -10,9 +11,10 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.responses import HTMLResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 import os, json, time
+from collections import deque
+import orjson
 
 # backend modules
-from backend.telemetry_collector import TelemetryCollector
 from backend.fault_detector import FaultDetector
 from backend.ai_path_manager import AIPathManager
 from backend.healing_manager import HealingManager
@@ -28,8 +30,8 @@ app.mount("/ui", StaticFiles(directory=ui_path), name="ui")
 # global state containers
 state = {
     "nodes": {},        # node_id -> last metrics
-    "faults": [],       # recorded fault events
-    "healing_history": []
+    "faults": deque(maxlen=1024),          # recent fault events (oldest dropped)
+    "healing_history": deque(maxlen=1024)  # recent healing outcomes
 }
 
 # simple websocket manager
@@ -47,25 +49,30 @@ class WSManager:
         except ValueError:
             pass
 
-    async def broadcast(self, msg: dict):
-        text = json.dumps(msg)
-        dead = []
-        for ws in list(self._conns):
-            try:
-                await ws.send_text(text)
-            except Exception:
-                dead.append(ws)
-        for d in dead:
-            self.disconnect(d)
+    async def broadcast(self, data: bytes):
+        """Send one pre-encoded event (see encode_event) to every client as a binary frame."""
+        # send to all clients concurrently so one slow socket does not hold up the rest
+        conns = list(self._conns)
+        results = await asyncio.gather(*(ws.send_bytes(data) for ws in conns), return_exceptions=True)
+        for ws, res in zip(conns, results):
+            if isinstance(res, Exception):
+                self.disconnect(ws)
 
 ws_mgr = WSManager()
 
+def encode_event(ev: dict) -> bytes:
+    # encoded once per event and shared by every websocket client (UTF-8 JSON, no str round-trip)
+    return orjson.dumps(ev)
+
 # create HAL and components (config via env vars or defaults)
 HAL_MODE = os.environ.get("HAL_MODE", "tcp")
 HAL_HOST = os.environ.get("HAL_HOST", "127.0.0.1")
 HAL_PORT = int(os.environ.get("HAL_PORT", "9000"))
-hal = HALAdapter(mode=HAL_MODE, tcp_host=HAL_HOST, tcp_port=HAL_PORT)
+HAL_FRAMING = os.environ.get("HAL_FRAMING", "newline")  # "newline" or "length"; must match the simulator
+hal = HALAdapter(mode=HAL_MODE, tcp_host=HAL_HOST, tcp_port=HAL_PORT, framing=HAL_FRAMING)
 cmd_sender = CommandSender(hal)
+# cmd_ack/cmd_result skip the incoming queue and telemetry backpressure
+hal.on_command_reply = cmd_sender.feed_incoming
 ai_manager = AIPathManager()
 healing_mgr = HealingManager(ai_manager, cmd_sender)
 
@@ -77,80 +84,104 @@ def announce_event(ev):
             state["healing_history"].append(ev)
     finally:
         # schedule broadcast asynchronously
-        asyncio.create_task(ws_mgr.broadcast(ev))
+        asyncio.create_task(ws_mgr.broadcast(encode_event(ev)))
 
 healing_mgr.on_event = announce_event
 
-telemetry_q = asyncio.Queue()
-telemetry_collector = TelemetryCollector(hal, telemetry_q)
+# bounded: a full queue makes hal_incoming_dispatcher wait (backpressure onto the HAL queue)
+telemetry_q = asyncio.Queue(maxsize=4096)
 
 # fault detector will call on_fault when fault detected
 def on_fault(fault_event):
     # log into state and send to ws and handoff to healing manager
     state["faults"].append(fault_event)
     # broadcast fault event (fire-and-forget)
-    asyncio.create_task(ws_mgr.broadcast({"type":"fault_event", **fault_event}))
+    asyncio.create_task(ws_mgr.broadcast(encode_event({"type":"fault_event", **fault_event.to_dict()})))
     # ask healing manager to handle it
     asyncio.create_task(healing_mgr.handle_fault(fault_event))
 
 fault_detector = FaultDetector(telemetry_q, on_fault_callback=on_fault,
                                heartbeat_timeout_ms=200, error_threshold=3)
 
-# feed incoming HAL messages to CommandSender so it can fulfill pending commands
+# route incoming HAL telemetry to the state and the detector
 async def hal_incoming_dispatcher():
     """
     Continuously read messages from HAL and dispatch:
       - update state (heartbeats)
-      - feed messages to command_sender (for awaiting cmd_result)
-      - put them on telemetry queue for detector
-    This loop is cancellable: it catches CancelledError and exits.
+      - put messages on telemetry queue for detector
+    Command replies never get here: the HAL reader hands them to command_sender directly
+    (hal.on_command_reply), so a lagging detector cannot delay or drop them.
+    It is the single consumer of hal.read_json(), so no message is lost to a competing reader.
+    Cancellation and unexpected errors propagate to supervise_background().
     """
-    try:
-        while True:
-            msg = await hal.read_json(timeout=0.5)
-            if msg:
-                # update state if heartbeat
-                if msg.get("msg_type") == "heartbeat" and msg.get("node_id"):
-                    node = msg["node_id"]
-                    state["nodes"][node] = msg.get("metrics", {})
-                # allow command_sender to fulfill pending futures
-                cmd_sender.feed_incoming(msg)
-                # push message into telemetry queue for detector as well
-                try:
-                    await telemetry_q.put(msg)
-                except asyncio.CancelledError:
-                    break
-            else:
-                await asyncio.sleep(0.01)
-    except asyncio.CancelledError:
-        # expected on shutdown: exit the loop
-        return
-    except Exception as e:
-        # log unexpected exception and exit
-        print("hal_incoming_dispatcher unexpected error:", e)
-        return
+    while True:
+        msg = await hal.read_json(timeout=0.5)
+        if msg is None:
+            # on timeout just re-loop: read_json already waited on the queue
+            continue
+        if not isinstance(msg, dict):
+            # valid JSON but not a HAL message object: skip it rather than fail the loop
+            print("hal_incoming_dispatcher: ignoring non-object message:", repr(msg)[:80])
+            continue
+        if msg:
+            mtype = msg.get("msg_type")
+            # update state if heartbeat
+            if mtype == "heartbeat" and msg.get("node_id"):
+                node = msg["node_id"]
+                state["nodes"][node] = msg.get("metrics", {})
+            # push message into telemetry queue for detector
+            await telemetry_q.put(msg)
+
+# supervisor restart delay: doubles while the loops keep failing, reset after a long clean run
+_RESTART_BACKOFF_BASE_S = 0.5
+_RESTART_BACKOFF_MAX_S = 30.0
+
+async def _run_forever(name: str, loop):
+    """Await a loop that should never return; a normal return is raised as an error."""
+    await loop
+    raise RuntimeError(f"{name} exited")
+
+async def supervise_background():
+    """
+    Own the long-running loops. If one crashes or returns (raised by _run_forever), the
+    TaskGroup cancels the other and both are restarted after a backoff, so detection never
+    stops silently. Cancelling this task cancels them all.
+    """
+    backoff = _RESTART_BACKOFF_BASE_S
+    while True:
+        started = time.monotonic()
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(_run_forever("hal_incoming_dispatcher", hal_incoming_dispatcher()))
+                tg.create_task(_run_forever("fault_detector", fault_detector.run()))
+        except* Exception as eg:
+            for e in eg.exceptions:
+                print("background task failed:", repr(e))
+        if time.monotonic() - started > _RESTART_BACKOFF_MAX_S:
+            backoff = _RESTART_BACKOFF_BASE_S
+        print(f"restarting background loops in {backoff:.1f}s")
+        await asyncio.sleep(backoff)
+        backoff = min(_RESTART_BACKOFF_MAX_S, backoff * 2)
 
 # -- Startup and shutdown handlers that properly manage background tasks --
 
 @app.on_event("startup")
 async def startup_event():
     """
-    Start HAL, telemetry collector, detector, and the hal_incoming_dispatcher background task.
-    Store created tasks on app.state['bg_tasks'] so shutdown can cancel them.
+    Start HAL, then the supervisor for the dispatcher and detector loops.
+    The supervisor task is kept on app.state so shutdown can cancel it.
     """
-    # ensure task list exists
-    app.state.bg_tasks = []
+    # Python 3.12+: tasks start running inside create_task() and skip the ready queue
+    # entirely if they finish before their first real suspension (broadcasts, fault handoffs)
+    if hasattr(asyncio, "eager_task_factory"):
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
 
     # start HAL adapter
     await hal.start()
 
-    # start hal_incoming_dispatcher as a background task and store it
-    hal_task = asyncio.create_task(hal_incoming_dispatcher())
-    app.state.bg_tasks.append(hal_task)
-
-    # start telemetry collector and fault detector
-    await telemetry_collector.start()
-    await fault_detector.start()
+    # hal_incoming_dispatcher + fault detector (fed by the dispatcher, no separate telemetry reader),
+    # restarted by the supervisor if either fails
+    app.state.supervisor = asyncio.create_task(supervise_background())
 
     print("Self-healing host started. Background tasks running.")
 
@@ -161,23 +192,11 @@ async def shutdown_event():
     This ensures the process can exit cleanly on CTRL+C.
     """
     print("Shutdown: cancelling background tasks...")
-    tasks = getattr(app.state, "bg_tasks", [])
-    # cancel tasks
-    for t in tasks:
-        t.cancel()
-    # wait for tasks to finish
-    if tasks:
-        await asyncio.gather(*tasks, return_exceptions=True)
-
-    # stop telemetry collector and detector (they'll exit their loops)
-    try:
-        await telemetry_collector.stop()
-    except Exception as e:
-        print("Error stopping telemetry_collector:", e)
-    try:
-        await fault_detector.stop()
-    except Exception as e:
-        print("Error stopping fault_detector:", e)
+    supervisor = getattr(app.state, "supervisor", None)
+    if supervisor is not None:
+        # cancels the dispatcher and detector together and waits for them
+        supervisor.cancel()
+        await asyncio.gather(supervisor, return_exceptions=True)
 
     # finally stop HAL adapter (closes connections)
     try:
@@ -195,7 +214,7 @@ async def ui_root():
 
 @app.get("/api/status")
 async def api_status():
-    return {"nodes": state["nodes"], "faults": state["faults"], "healing_history": state["healing_history"]}
+    return {"nodes": state["nodes"], "faults": [f.to_dict() for f in state["faults"]], "healing_history": list(state["healing_history"])}
 
 @app.post("/api/inject_fault")
 async def api_inject_fault(req: Request):
@@ -216,7 +235,8 @@ async def api_inject_fault(req: Request):
         "evidence": {"source":"api_inject"}
     }
     # If HAL supports sending JSON back (simulator), do that so hal_incoming_dispatcher will pick it up too.
-    await hal.send_json(evt)
+    if not await hal.send_json(evt):
+        return {"status":"error", "reason":"hal_not_connected", "event": evt}
     return {"status":"injected", "event": evt}
 
 # websocket endpoint for UI
@@ -233,4 +253,5 @@ async def websocket_endpoint(ws: WebSocket):
 
 if __name__ == "__main__":
     # run uvicorn programmatically so CTRL+C handling by uvicorn will trigger FastAPI shutdown events
+    # uvicorn's default loop="auto" already runs on uvloop when it is installed
     uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=False)
\ No newline at end of file
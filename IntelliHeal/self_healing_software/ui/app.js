@@ -14,6 +14,8 @@ const RECONNECT_MS = 2000;
 let ws = null;
 let wsReady = false;
 let wsQueue = [];
+// server events arrive as binary frames of UTF-8 JSON
+const wsDecoder = new TextDecoder();
 
 const DOM = {};
 let componentIds = [];
@@ -23,6 +25,7 @@ const chartStore = {}; // { nodeId: { history:{hb:[]}, charts: {hb: Chart} } }
 function initWebSocket() {
   if (ws && (ws.readyState === WebSocket.OPEN || ws.readyState === WebSocket.CONNECTING)) return;
   ws = new WebSocket(WS_URL);
+  ws.binaryType = "arraybuffer";
 
   ws.addEventListener("open", () => {
     console.info("[WS] connected");
@@ -39,7 +42,8 @@ function initWebSocket() {
 
   ws.addEventListener("message", (ev) => {
     try {
-      const msg = JSON.parse(ev.data);
+      const text = typeof ev.data === "string" ? ev.data : wsDecoder.decode(ev.data);
+      const msg = JSON.parse(text);
       handleWSMessage(msg);
     } catch (e) {
       console.error("[WS] invalid JSON", e, ev.data);